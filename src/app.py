@@ -5,19 +5,81 @@ A super simple FastAPI application that allows students to view and sign up
 for extracurricular activities at Mergington High School.
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import Headers
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.routing import Route
+from urllib.parse import parse_qsl
+import gzip
+import hashlib
+import mimetypes
+import orjson
 import os
+import re
+import sys
 from pathlib import Path
 
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding value allows gzip, honouring ``q=0`` opt-outs"""
+    wildcard = False
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        if name not in ("gzip", "*"):
+            continue
+        allowed = True
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    allowed = float(value) > 0
+                except ValueError:
+                    allowed = False
+        if name == "gzip":
+            return allowed
+        wildcard = allowed
+    return wildcard
+
+
+class _GZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that parses Accept-Encoding instead of substring-matching it"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not _accepts_gzip(Headers(scope=scope).get("accept-encoding", "")):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
 app = FastAPI(title="Mergington High School API",
               description="API for viewing and signing up for extracurricular activities")
+app.add_middleware(_GZipMiddleware, minimum_size=512)
+
+# Static files are few and small, so read them all once at startup and
+# serve them from memory, each with a pre-gzipped copy (None when gzip
+# doesn't shrink it), its Content-Type and a content-hash ETag
+_STATIC_DIR = Path(__file__).parent / "static"
+
+
+def _load_static(path: Path) -> tuple[bytes, bytes | None, bytes, str]:
+    content = path.read_bytes()
+    gzipped = gzip.compress(content, mtime=0)
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if media_type.startswith("text/"):
+        media_type += "; charset=utf-8"
+    etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+    return content, gzipped if len(gzipped) < len(content) else None, media_type.encode(), etag
 
-# Mount the static files directory
-current_dir = Path(__file__).parent
-app.mount("/static", StaticFiles(directory=os.path.join(Path(__file__).parent,
-          "static")), name="static")
+
+_STATIC_FILES: dict[str, tuple[bytes, bytes | None, bytes, str]] = {
+    path.relative_to(_STATIC_DIR).as_posix(): _load_static(path)
+    for path in _STATIC_DIR.rglob("*")
+    if path.is_file()
+}
+_STATIC_NOT_FOUND = JSONResponse({"detail": "Not Found"}, status_code=404)
 
 # In-memory activity database
 activities = {
@@ -77,50 +139,304 @@ activities = {
         }
 }
 
+# Activities are stored struct-of-arrays style, indexed by an integer ID in
+# catalogue order; a route's activity name resolves to its ID in one lookup
+_NAMES: tuple[str, ...] = tuple(activities)
+_NAME_TO_ID: dict[str, int] = {name: activity_id for activity_id, name in enumerate(_NAMES)}
+
+# JSON-escaped UTF-8 names, spliced into response messages
+_NAME_BYTES: tuple[bytes, ...] = tuple(orjson.dumps(name)[1:-1] for name in _NAMES)
+
+# Immutable activity metadata, pre-serialized as the JSON fragment
+# '"<name>":{"description":...,"max_participants":N' so GET /activities
+# only has to encode the participants arrays
+_META: tuple[bytes, ...] = tuple(
+    orjson.dumps(name) + b":{" + orjson.dumps({
+        "description": activities[name]["description"],
+        "schedule": activities[name]["schedule"],
+        "max_participants": activities[name]["max_participants"],
+    })[1:-1]
+    for name in _NAMES
+)
+
+# Concurrency: every handler is ``async def`` and never awaits between reading
+# and mutating state, so the worker's single event loop serializes all access
+# and no locks are needed. Don't add sync ``def`` handlers or threads that
+# touch this state: FastAPI runs those on a threadpool, which would race.
+# Multiple worker processes each hold their own copy; sharing state across
+# them needs an external store such as Redis.
+#
+# Mutable participants store, one insertion-ordered dict of emails per
+# activity so membership, add and remove are all O(1). The dicts are shared
+# with ``activities`` so it stays accurate; emails are interned so repeated
+# lookups reuse one string object per student
+_PARTICIPANTS: list[dict[str, None]] = []
+for name in _NAMES:
+    details = activities[name]
+    details["participants"] = dict.fromkeys(sys.intern(email) for email in details["participants"])
+    _PARTICIPANTS.append(details["participants"])
+
+# Seed participants per activity ID, restored by reset_state()
+_SEED_PARTICIPANTS: tuple[tuple[str, ...], ...] = tuple(tuple(participants) for participants in _PARTICIPANTS)
+
+# Serialized GET /activities payload as (plain, gzipped) bytes, rebuilt
+# lazily after each mutation so compression also happens once per change
+_activities_cache: tuple[bytes, bytes] | None = None
+
+# Validator for the payload: bumped on every mutation and tagged with a
+# per-process ID so a restarted server never matches a stale client copy
+_BOOT_ID = os.urandom(4).hex()
+_version = 0
+_activities_etag = f'W/"{_BOOT_ID}-{_version}"'
 
-@app.get("/")
-def root():
-    return RedirectResponse(url="/static/index.html")
+
+def _rebuild_cache() -> tuple[bytes, bytes]:
+    global _activities_cache
+    body = b"{" + b",".join(
+        meta + b',"participants":' + orjson.dumps(list(participants)) + b"}"
+        for meta, participants in zip(_META, _PARTICIPANTS)
+    ) + b"}"
+    _activities_cache = (body, gzip.compress(body, mtime=0))
+    return _activities_cache
+
+
+def _invalidate_cache():
+    global _activities_cache, _version, _activities_etag
+    _activities_cache = None
+    _version += 1
+    _activities_etag = f'W/"{_BOOT_ID}-{_version}"'
+
+
+def reset_state():
+    """Restore every activity's participants to the seed data"""
+    for participants, seed in zip(_PARTICIPANTS, _SEED_PARTICIPANTS):
+        participants.clear()
+        participants.update(dict.fromkeys(seed))
+    _invalidate_cache()
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match value covers ``etag`` (``*`` matches anything)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def static_file(scope, receive, send):
+    static = _STATIC_FILES.get(scope["path_params"]["path"])
+    if static is None:
+        await _STATIC_NOT_FOUND(scope, receive, send)
+        return
+    content, gzipped, media_type, etag = static
+
+    request_headers = Headers(scope=scope)
+    headers = [
+        (b"etag", etag.encode()),
+        (b"cache-control", b"no-cache"),
+        (b"vary", b"Accept-Encoding"),
+    ]
+    if _etag_matches(request_headers.get("if-none-match"), etag):
+        status, body = 304, b""
+    else:
+        status, body = 200, content
+        if gzipped is not None and _accepts_gzip(request_headers.get("accept-encoding", "")):
+            # Already compressed, so GZipMiddleware passes it through untouched
+            body = gzipped
+            headers.append((b"content-encoding", b"gzip"))
+        headers.append((b"content-type", media_type))
+        headers.append((b"content-length", str(len(body)).encode()))
+
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
 
 
 @app.get("/activities")
-def get_activities():
-    return activities
+async def get_activities(request: Request):
+    headers = {
+        "ETag": _activities_etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), _activities_etag):
+        return Response(status_code=304, headers=headers)
+
+    body, gzipped = _activities_cache or _rebuild_cache()
+    if _accepts_gzip(request.headers.get("accept-encoding", "")):
+        # Already compressed, so GZipMiddleware passes it through untouched
+        headers["Content-Encoding"] = "gzip"
+        return Response(gzipped, media_type="application/json", headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+# School addresses only, with the domain matched case-insensitively. The
+# pattern has no nested or overlapping quantifiers, so matching is a single
+# linear pass with no backtracking blowup
+_EMAIL_DOMAIN = "@mergington.edu"
+_EMAIL_RE = re.compile(r"\A[A-Za-z0-9._%+\-]+@(?i:mergington\.edu)\Z").match
+
+
+def _normalize_email(email: str) -> str | None:
+    """Return a school email with its domain lowercased, or None if invalid"""
+    if not _EMAIL_RE(email):
+        return None
+    return email[:-len(_EMAIL_DOMAIN)] + _EMAIL_DOMAIN
 
 
-@app.post("/activities/{activity_name}/signup")
-def signup_for_activity(activity_name: str, email: str):
+def _query_email(scope) -> str | None:
+    """Pull the ``email`` query parameter out of a raw ASGI scope"""
+    for key, value in parse_qsl(scope["query_string"].decode("latin-1")):
+        if key == "email":
+            return value
+    return None
+
+
+# Error responses carry fixed messages, so each is built once and replayed as
+# an ASGI app (Starlette responses don't mutate themselves when sent)
+_ERR_MISSING_EMAIL = JSONResponse({"detail": "Missing email query parameter"}, status_code=422)
+_ERR_BAD_EMAIL = JSONResponse({"detail": "Invalid email, use your @mergington.edu address"}, status_code=400)
+_ERR_NOT_FOUND = JSONResponse({"detail": "Activity not found"}, status_code=404)
+_ERR_ALREADY_SIGNED_UP = JSONResponse({"detail": "Already signed up for this activity"}, status_code=400)
+_ERR_NOT_SIGNED_UP = JSONResponse({"detail": "Student is not signed up for this activity"}, status_code=400)
+
+
+async def _send_json(send, status: int, body: bytes):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _message_body(action: bytes, email: str, joiner: bytes, name_bytes: bytes) -> bytes:
+    """Build '{"message":"<action><email><joiner><name>"}' without a JSON encoder"""
+    if email.isascii() and email.isprintable() and '"' not in email and "\\" not in email:
+        email_bytes = email.encode()
+    else:
+        email_bytes = orjson.dumps(email)[1:-1]
+    return b"".join((b'{"message":"', action, email_bytes, joiner, name_bytes, b'"}'))
+
+
+class _ASGIEndpoint:
+    """Wrap a ``(scope, receive, send)`` coroutine so Route serves it as raw ASGI
+
+    Route only adapts plain functions into request/response handlers; any
+    other callable is used as an ASGI app as-is.
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.__name__ = endpoint.__name__
+
+    async def __call__(self, scope, receive, send):
+        await self.endpoint(scope, receive, send)
+
+
+def _asgi_route(path: str, endpoint, methods: list[str]) -> Route:
+    """Route that hands the endpoint the raw ASGI call instead of a Request"""
+    return Route(path, _ASGIEndpoint(endpoint), methods=methods, include_in_schema=False)
+
+
+async def signup_for_activity(scope, receive, send):
     """Sign up a student for an activity"""
-    # Validate activity exists
-    if activity_name not in activities:
-        raise HTTPException(status_code=404, detail="Activity not found")
+    activity_name = scope["path_params"]["activity_name"]
+    email = _query_email(scope)
+    if email is None:
+        await _ERR_MISSING_EMAIL(scope, receive, send)
+        return
+    email = _normalize_email(email)
+    if email is None:
+        await _ERR_BAD_EMAIL(scope, receive, send)
+        return
 
-    # Get the specific activity
-    activity = activities[activity_name]
+    # Validate activity exists
+    activity_id = _NAME_TO_ID.get(activity_name)
+    if activity_id is None:
+        await _ERR_NOT_FOUND(scope, receive, send)
+        return
+    participants = _PARTICIPANTS[activity_id]
 
     # Validate student is not already signed up for the activity
-    if email in activity["participants"]:
-        raise HTTPException(status_code=400, detail="Already signed up for this activity")
+    if email in participants:
+        await _ERR_ALREADY_SIGNED_UP(scope, receive, send)
+        return
 
     # Add student
-    activity["participants"].append(email)
-    return {"message": f"Signed up {email} for {activity_name}"}
+    email = sys.intern(email)
+    participants[email] = None
+    _invalidate_cache()
+    await _send_json(send, 200, _message_body(b"Signed up ", email, b" for ", _NAME_BYTES[activity_id]))
 
 
-@app.delete("/activities/{activity_name}/unregister")
-def unregister_from_activity(activity_name: str, email: str):
+async def unregister_from_activity(scope, receive, send):
     """Unregister a student from an activity"""
-    # Validate activity exists
-    if activity_name not in activities:
-        raise HTTPException(status_code=404, detail="Activity not found")
+    activity_name = scope["path_params"]["activity_name"]
+    email = _query_email(scope)
+    if email is None:
+        await _ERR_MISSING_EMAIL(scope, receive, send)
+        return
+    # Match the form stored at signup; other addresses can't be signed up
+    email = _normalize_email(email) or email
 
-    # Get the specific activity
-    activity = activities[activity_name]
+    # Validate activity exists
+    activity_id = _NAME_TO_ID.get(activity_name)
+    if activity_id is None:
+        await _ERR_NOT_FOUND(scope, receive, send)
+        return
+    participants = _PARTICIPANTS[activity_id]
 
     # Validate student is signed up
-    if email not in activity["participants"]:
-        raise HTTPException(status_code=400, detail="Student is not signed up for this activity")
+    if email not in participants:
+        await _ERR_NOT_SIGNED_UP(scope, receive, send)
+        return
 
     # Remove student
-    activity["participants"].remove(email)
-    return {"message": f"Unregistered {email} from {activity_name}"}
+    del participants[email]
+    _invalidate_cache()
+    await _send_json(send, 200, _message_body(b"Unregistered ", email, b" from ", _NAME_BYTES[activity_id]))
+
+
+# The root redirect never changes, so its ASGI messages are built once
+_ROOT_START = {
+    "type": "http.response.start",
+    "status": 307,
+    "headers": [(b"location", b"/static/index.html"), (b"content-length", b"0")],
+}
+_ROOT_BODY = {"type": "http.response.body", "body": b""}
+
+
+async def root(scope, receive, send):
+    await send(_ROOT_START)
+    await send(_ROOT_BODY)
+
+
+app.router.routes.append(_asgi_route("/", root, ["GET"]))
+app.router.routes.append(_asgi_route("/static/{path:path}", static_file, ["GET"]))
+
+# Writes are mounted as plain ASGI routes to skip FastAPI's dependency
+# resolution and validation for their single query parameter
+app.router.routes.append(
+    _asgi_route("/activities/{activity_name}/signup", signup_for_activity, ["POST"]))
+app.router.routes.append(
+    _asgi_route("/activities/{activity_name}/unregister", unregister_from_activity, ["DELETE"]))
+
+
+# Keep the middleware stack pure ASGI. BaseHTTPMiddleware, which also backs
+# @app.middleware("http"), adds task and stream overhead to every request
+assert not any(
+    isinstance(middleware.cls, type) and issubclass(middleware.cls, BaseHTTPMiddleware)
+    for middleware in app.user_middleware
+), "Use pure ASGI middleware classes, not BaseHTTPMiddleware"
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Activity state lives in this process, so run a single worker unless
+    # WEB_CONCURRENCY asks for more (each worker then keeps its own copy)
+    uvicorn.run("src.app:app", loop="uvloop", http="httptools", access_log=False,
+                workers=int(os.environ.get("WEB_CONCURRENCY", 1)))
@@ -4,7 +4,7 @@ Tests for the Mergington High School Activities API
 
 import pytest
 from fastapi.testclient import TestClient
-from src.app import app, activities
+from src.app import app, reset_state
 
 # Create a test client
 client = TestClient(app)
@@ -12,23 +12,9 @@ client = TestClient(app)
 
 @pytest.fixture
 def reset_activities():
-    """Reset activities to initial state before each test"""
-    # Store original state
-    original_activities = {
-        name: {
-            "description": details["description"],
-            "schedule": details["schedule"],
-            "max_participants": details["max_participants"],
-            "participants": details["participants"].copy()
-        }
-        for name, details in activities.items()
-    }
-    
+    """Reset activities to initial state after each test"""
     yield
-    
-    # Restore original state
-    activities.clear()
-    activities.update(original_activities)
+    reset_state()
 
 
 class TestGetActivities:
@@ -61,6 +47,47 @@ class TestGetActivities:
         activities_data = response.json()
         
         assert isinstance(activities_data["Chess Club"]["participants"], list)
+    
+    def test_get_activities_gzipped(self, reset_activities):
+        """Test that activities are gzipped when the client accepts it"""
+        response = client.get("/activities", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Chess Club" in response.json()
+    
+    def test_get_activities_uncompressed(self, reset_activities):
+        """Test that activities are sent plain when gzip is not accepted"""
+        response = client.get("/activities", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert "Chess Club" in response.json()
+    
+    def test_get_activities_gzip_refused(self, reset_activities):
+        """Test that gzip with q=0 is not used even though it is listed"""
+        response = client.get(
+            "/activities", headers={"Accept-Encoding": "gzip;q=0, identity"}
+        )
+        assert "content-encoding" not in response.headers
+        assert "Chess Club" in response.json()
+    
+    def test_get_activities_not_modified(self, reset_activities):
+        """Test that a matching If-None-Match returns 304 with no body"""
+        etag = client.get("/activities").headers["etag"]
+        response = client.get("/activities", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+    
+    def test_get_activities_not_modified_wildcard(self, reset_activities):
+        """Test that If-None-Match: * returns 304 since activities exist"""
+        response = client.get("/activities", headers={"If-None-Match": "*"})
+        assert response.status_code == 304
+    
+    def test_get_activities_etag_changes_after_signup(self, reset_activities):
+        """Test that a signup invalidates the previous ETag"""
+        etag = client.get("/activities").headers["etag"]
+        client.post("/activities/Chess Club/signup?email=etag@mergington.edu")
+        
+        response = client.get("/activities", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
 
 
 class TestSignupForActivity:
@@ -74,6 +101,15 @@ class TestSignupForActivity:
         assert response.status_code == 200
         assert "Signed up" in response.json()["message"]
     
+    def test_signup_message_names_student_and_activity(self, reset_activities):
+        """Test that the signup message names the student and the activity"""
+        response = client.post(
+            "/activities/Chess Club/signup?email=test@mergington.edu"
+        )
+        assert response.json() == {
+            "message": "Signed up test@mergington.edu for Chess Club"
+        }
+    
     def test_signup_adds_participant(self, reset_activities):
         """Test that signup actually adds the participant"""
         client.post("/activities/Chess Club/signup?email=newstudent@mergington.edu")
@@ -82,6 +118,14 @@ class TestSignupForActivity:
         participants = response.json()["Chess Club"]["participants"]
         assert "newstudent@mergington.edu" in participants
     
+    def test_signup_refreshes_cached_activities(self, reset_activities):
+        """Test that a signup is visible after activities were already served"""
+        client.get("/activities")
+        client.post("/activities/Chess Club/signup?email=cached@mergington.edu")
+        
+        response = client.get("/activities")
+        assert "cached@mergington.edu" in response.json()["Chess Club"]["participants"]
+    
     def test_signup_duplicate_returns_400(self, reset_activities):
         """Test that signing up twice returns 400 error"""
         email = "michael@mergington.edu"  # Already signed up for Chess Club
@@ -97,6 +141,33 @@ class TestSignupForActivity:
         assert response.status_code == 404
         assert "not found" in response.json()["detail"].lower()
     
+    def test_signup_without_email_returns_422(self, reset_activities):
+        """Test that signing up without an email returns 422 error"""
+        response = client.post("/activities/Chess Club/signup")
+        assert response.status_code == 422
+    
+    def test_signup_invalid_email_returns_400(self, reset_activities):
+        """Test that signing up with a non-school email returns 400 error"""
+        response = client.post(
+            "/activities/Chess Club/signup?email=test@example.com"
+        )
+        assert response.status_code == 400
+        assert "invalid email" in response.json()["detail"].lower()
+    
+    def test_signup_domain_is_case_insensitive(self, reset_activities):
+        """Test that the email domain is accepted in any case and stored lowercased"""
+        response = client.post(
+            "/activities/Chess Club/signup?email=Student@Mergington.EDU"
+        )
+        assert response.status_code == 200
+        
+        duplicate = client.post(
+            "/activities/Chess Club/signup?email=Student@mergington.edu"
+        )
+        assert duplicate.status_code == 400
+        participants = client.get("/activities").json()["Chess Club"]["participants"]
+        assert "Student@mergington.edu" in participants
+    
     def test_signup_multiple_activities(self, reset_activities):
         """Test that a student can sign up for multiple activities"""
         email = "alice@mergington.edu"
@@ -149,6 +220,13 @@ class TestUnregisterFromActivity:
         assert response.status_code == 400
         assert "not signed up" in response.json()["detail"].lower()
     
+    def test_unregister_domain_is_case_insensitive(self, reset_activities):
+        """Test that unregister matches the email domain in any case"""
+        response = client.delete(
+            "/activities/Chess Club/unregister?email=michael@MERGINGTON.EDU"
+        )
+        assert response.status_code == 200
+    
     def test_signup_after_unregister(self, reset_activities):
         """Test that a student can re-register after unregistering"""
         email = "michael@mergington.edu"
@@ -173,3 +251,42 @@ class TestRootRoute:
         response = client.get("/", follow_redirects=False)
         assert response.status_code == 307
         assert "/static/index.html" in response.headers["location"]
+
+
+class TestStaticFiles:
+    """Test /static routes"""
+    
+    def test_static_index_served(self, reset_activities):
+        """Test that the frontend page is served as HTML"""
+        response = client.get("/static/index.html")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/html")
+    
+    def test_static_missing_file_returns_404(self, reset_activities):
+        """Test that an unknown static path returns 404"""
+        response = client.get("/static/missing.js")
+        assert response.status_code == 404
+    
+    def test_static_head_supported(self, reset_activities):
+        """Test that HEAD on a static file returns headers without a body"""
+        response = client.head("/static/index.html")
+        assert response.status_code == 200
+        assert response.content == b""
+    
+    def test_static_not_modified(self, reset_activities):
+        """Test that a matching If-None-Match on a static file returns 304"""
+        etag = client.get("/static/app.js").headers["etag"]
+        response = client.get("/static/app.js", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+    
+    def test_static_gzipped(self, reset_activities):
+        """Test that static files are gzipped when the client accepts it"""
+        response = client.get("/static/app.js", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "fetchActivities" in response.text
+    
+    def test_static_not_in_schema(self, reset_activities):
+        """Test that the static route is not listed in the OpenAPI schema"""
+        paths = client.get("/openapi.json").json()["paths"]
+        assert not any(path.startswith("/static") for path in paths)